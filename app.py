@@ -1,7 +1,49 @@
 import streamlit as st
 import requests
-import json
+import io
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ---------------- HTTP Session ----------------
+@st.cache_resource(show_spinner=False)
+def get_http() -> requests.Session:
+    """Pooled keep-alive session reused across reruns (no TLS handshake per search)."""
+    session = requests.Session()
+    # retry only failed connects; the search itself is never replayed after it reached the API
+    retries = Retry(total=2, read=0, backoff_factor=0.2)
+    session.mount("https://", HTTPAdapter(max_retries=retries))
+    return session
+
+def records_to_table(records):
+    """
+    Build an Arrow table straight from the match records so st.dataframe can skip
+    the pandas -> Arrow conversion. Columns are the union of keys across rows;
+    falls back to pandas when Arrow can't settle on one type per column.
+    """
+    columns = dict.fromkeys(key for record in records for key in record)
+    try:
+        return pa.Table.from_pydict({c: [record.get(c) for record in records] for c in columns})
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pd.DataFrame.from_records(records)
+
+# bounded: each distinct result set would otherwise keep a CSV copy in memory for good
+@st.cache_data(show_spinner=False, ttl=600, max_entries=32)
+def records_to_csv(records) -> bytes:
+    """CSV bytes for one table's matches, memoized on the records' content."""
+    table = records_to_table(records)
+    if isinstance(table, pa.Table):
+        try:
+            # Arrow's CSV writer is C++ and releases the GIL
+            buf = io.BytesIO()
+            pa_csv.write_csv(table, buf)
+            return buf.getvalue()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # nested values (lists/objects) aren't representable in Arrow CSV
+            table = pd.DataFrame.from_records(records)
+    return table.to_csv(index=False).encode("utf-8")
 
 # ---------------- UI Setup ----------------
 st.set_page_config(page_title="SniffR 🐾 by Ever Tech", layout="wide")
@@ -98,56 +140,73 @@ with st.form(key="indiav1_search_form"):
     submit_btn = st.form_submit_button("Search")
 
 # ---------------- API Call ----------------
+# Tables rendered up front; the rest stay collapsed behind a toggle so their
+# dataframe + CSV work only happens when someone actually opens them.
+EAGER_TABLES = 3
+
 if submit_btn:
     if not api_url or not jwt_token or not user_id:
+        st.session_state.pop("sniffr_data", None)
         st.error("API URL, JWT token, or user ID missing. Please check your secrets.")
     elif not query.strip():
+        st.session_state.pop("sniffr_data", None)
         st.error("Please enter a search query.")
     else:
         payload = {"query": query, "userId": user_id}
-        headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
+        headers = {"Authorization": f"Bearer {jwt_token}"}
 
         try:
             with st.spinner("Sniffing records... 🐕"):
-                response = requests.post(api_url, headers=headers, data=json.dumps(payload))
+                # json= serializes and sets Content-Type in one step
+                response = get_http().post(api_url, headers=headers, json=payload, timeout=30)
 
             if response.ok:
-                data = response.json()
-
-                # Show quick stats
-                stats_col1, stats_col2, stats_col3 = st.columns(3)
-                stats_col1.metric("Execution Time (ms)", data.get("executionTimeMs", "N/A"))
-                stats_col2.metric("Total Matches", data.get("totalMatches", "N/A"))
-                stats_col3.metric("Tables With Matches", len(data.get("tablesWithMatches", [])))
-
-                st.markdown("---")
-
-                results = data.get("results", [])
-                results_with_matches = [t for t in results if t.get("matches")]
-
-                if results_with_matches:
-                    for table_result in results_with_matches:
-                        table_name = table_result.get("table", "Unknown")
-                        matches = table_result.get("matches", [])
-
-                        st.subheader(f"📂 Table: {table_name}")
-
-                        # Convert matches into dataframe
-                        df = pd.DataFrame(matches)
-                        st.dataframe(df, use_container_width=True)
-
-                        # Add download button
-                        csv = df.to_csv(index=False).encode("utf-8")
-                        st.download_button(
-                            label=f"⬇️ Download {table_name} Matches",
-                            data=csv,
-                            file_name=f"{table_name}_matches.csv",
-                            mime="text/csv"
-                        )
-                else:
-                    st.warning("⚠️ No enforcement matches found in any table.")
+                # keep the response across reruns so opening a lazy table doesn't lose it
+                st.session_state["sniffr_data"] = response.json()
             else:
+                st.session_state.pop("sniffr_data", None)
                 st.error(f"Request failed: {response.status_code} - {response.text}")
 
         except Exception as e:
+            st.session_state.pop("sniffr_data", None)
             st.error(f"🚨 Error contacting API: {e}")
+
+# ---------------- Results ----------------
+def render_table(table_name, matches):
+    # Convert matches into an Arrow table (pandas fallback)
+    st.dataframe(records_to_table(matches), use_container_width=True)
+
+    # Add download button
+    csv = records_to_csv(matches)
+    st.download_button(
+        label=f"⬇️ Download {table_name} Matches",
+        data=csv,
+        file_name=f"{table_name}_matches.csv",
+        mime="text/csv"
+    )
+
+data = st.session_state.get("sniffr_data")
+if data is not None:
+    # Show quick stats
+    stats_col1, stats_col2, stats_col3 = st.columns(3)
+    stats_col1.metric("Execution Time (ms)", data.get("executionTimeMs", "N/A"))
+    stats_col2.metric("Total Matches", data.get("totalMatches", "N/A"))
+    stats_col3.metric("Tables With Matches", len(data.get("tablesWithMatches", [])))
+
+    st.markdown("---")
+
+    results = data.get("results", [])
+    results_with_matches = [t for t in results if t.get("matches")]
+
+    if results_with_matches:
+        for idx, table_result in enumerate(results_with_matches):
+            table_name = table_result.get("table", "Unknown")
+            matches = table_result.get("matches", [])
+
+            st.subheader(f"📂 Table: {table_name}")
+            if idx < EAGER_TABLES:
+                render_table(table_name, matches)
+            elif st.toggle(f"Show {len(matches)} matches", key=f"sniffr_show_{idx}_{table_name}"):
+                render_table(table_name, matches)
+    else:
+        st.warning("⚠️ No enforcement matches found in any table.")
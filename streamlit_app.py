@@ -1,16 +1,19 @@
 import streamlit as st
 from kiteconnect import KiteConnect
+from urllib3.util.retry import Retry
 import pandas as pd
+import os
 import json
+import tempfile
+import hashlib
 import time
-from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta, timezone
+from pathlib import Path
+from dataclasses import dataclass
 from typing import Optional, List, Dict
 import re
 
-# Supabase Python client
-# pip install supabase
-from supabase import create_client, Client
-
 st.set_page_config(page_title="Kite + Supabase — Restricted Securities Checker", layout="wide")
 st.title("Kite Connect (Zerodha) — Streamlit demo with Supabase restricted-check")
 
@@ -18,43 +21,101 @@ st.title("Kite Connect (Zerodha) — Streamlit demo with Supabase restricted-che
 # CONFIG / SECRETS
 # ---------------------------
 # Put kite and supabase credentials in Streamlit secrets as shown above
-try:
-    kite_conf = st.secrets["kite"]
-    API_KEY = kite_conf.get("api_key")
-    API_SECRET = kite_conf.get("api_secret")
-    REDIRECT_URI = kite_conf.get("redirect_uri")
-except Exception:
-    API_KEY = None
-    API_SECRET = None
-    REDIRECT_URI = None
-
-try:
-    supa_conf = st.secrets["supabase"]
-    SUPABASE_URL = supa_conf.get("url")
-    SUPABASE_KEY = supa_conf.get("key")
-except Exception:
-    SUPABASE_URL = None
-    SUPABASE_KEY = None
+@dataclass(frozen=True)
+class AppConfig:
+    api_key: Optional[str]
+    api_secret: Optional[str]
+    redirect_uri: Optional[str]
+    supabase_url: Optional[str]
+    supabase_key: Optional[str]
+
+def _section(name: str) -> dict:
+    try:
+        return dict(st.secrets[name])
+    except Exception:
+        return {}
+
+@st.cache_resource(show_spinner=False)
+def load_config() -> AppConfig:
+    """Parse secrets once per process instead of on every rerun."""
+    kite_conf = _section("kite")
+    supa_conf = _section("supabase")
+    return AppConfig(
+        api_key=kite_conf.get("api_key"),
+        api_secret=kite_conf.get("api_secret"),
+        redirect_uri=kite_conf.get("redirect_uri"),
+        supabase_url=supa_conf.get("url"),
+        supabase_key=supa_conf.get("key"),
+    )
+
+CONFIG = load_config()
+API_KEY = CONFIG.api_key
+API_SECRET = CONFIG.api_secret
+REDIRECT_URI = CONFIG.redirect_uri
+SUPABASE_URL = CONFIG.supabase_url
+SUPABASE_KEY = CONFIG.supabase_key
 
 if not API_KEY or not API_SECRET or not REDIRECT_URI:
+    load_config.clear()  # don't pin the missing values; re-read once secrets are added
     st.error("Missing Kite credentials in Streamlit secrets. Add [kite] api_key, api_secret and redirect_uri.")
     st.stop()
 
 if not SUPABASE_URL or not SUPABASE_KEY:
+    load_config.clear()
     st.error("Missing Supabase credentials in Streamlit secrets. Add [supabase] url and key.")
     st.stop()
 
 # ---------------------------
 # Supabase client init
 # ---------------------------
-# Uses supabase-py (create_client)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Uses supabase-py (create_client); cached so reruns reuse the same
+# postgrest/gotrue HTTP clients instead of rebuilding them on every widget change.
+# Created on first restricted-check query, not at startup: importing supabase-py
+# (httpx, gotrue, postgrest, realtime, storage) is a large share of cold start.
+@st.cache_resource(show_spinner=False)
+def get_supabase(url: str, key: str):
+    # pip install supabase
+    from supabase import create_client
+    return create_client(url, key)
 
 # ---------------------------
-# Kite init (unauth client)
+# Kite init (cached clients; unauth one for login URL & session exchange)
 # ---------------------------
-kite_client = KiteConnect(api_key=API_KEY)
-login_url = kite_client.login_url()
+# Streamlit reruns the whole script on every widget change; reuse one client
+# (and its requests.Session keep-alive pool) per (api_key, access_token).
+# HTTPAdapter settings for the client's session: enough kept-alive connections
+# for the concurrent fetches below, so they reuse TLS instead of reconnecting.
+# Transient 429/5xx are retried for reads only -- never order placement/changes.
+KITE_POOL = {
+    "pool_connections": 10,
+    "pool_maxsize": 20,
+    "max_retries": Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,  # hand the last response back so kiteconnect reports the API error
+    ),
+}
+
+# Kite access tokens expire daily: drop clients after a day and cap how many are kept
+@st.cache_resource(show_spinner=False, ttl=24 * 3600, max_entries=64)
+def get_kite(api_key: str, access_token: Optional[str] = None) -> KiteConnect:
+    client = KiteConnect(api_key=api_key, pool=KITE_POOL)
+    if access_token:
+        client.set_access_token(access_token)
+    return client
+
+@st.cache_data(show_spinner=False)
+def get_login_url(api_key: str) -> str:
+    return get_kite(api_key).login_url()
+
+login_url = get_login_url(API_KEY)
+
+# ---------------------------
+# On-disk cache for instrument dumps (survives reruns, reloads and process restarts)
+# ---------------------------
+CACHE_DIR = Path(".kite_cache")
 
 # Sidebar: show login link
 with st.sidebar:
@@ -63,189 +124,316 @@ with st.sidebar:
     st.markdown(f"[🔗 Open Kite login]({login_url})")
     st.caption("After login, Streamlit reads request_token from URL query params (Streamlit >=1.14).")
 
-# read request_token from URL (Streamlit >= 1.14)
-query_params = st.experimental_get_query_params()
-request_token = None
-if "request_token" in query_params:
-    rt = query_params.get("request_token")
-    if isinstance(rt, list):
-        request_token = rt[0]
-    else:
-        request_token = rt
+# read request_token from URL (st.query_params returns the last value as a str)
+request_token = st.query_params.get("request_token")
 
 # Exchange request_token for access_token (store in session_state)
 if request_token and "kite_access_token" not in st.session_state:
     st.info("Received request_token — exchanging for access token...")
     try:
-        data = kite_client.generate_session(request_token, api_secret=API_SECRET)
+        # fresh client: generate_session() sets the access token on the instance it
+        # runs on, and get_kite() clients are shared across sessions by cache_resource
+        data = KiteConnect(api_key=API_KEY).generate_session(request_token, api_secret=API_SECRET)
         access_token = data.get("access_token")
         st.session_state["kite_access_token"] = access_token
         st.session_state["kite_login_response"] = data
+        # drop the single-use token from the URL so reruns/reloads (or a rerun
+        # after Logout) don't try to exchange it again
+        st.query_params.pop("request_token", None)
         st.success("Access token obtained and stored in session.")
         st.download_button("⬇️ Download token JSON", json.dumps(data, default=str), file_name="kite_token.json")
     except Exception as e:
         st.error(f"Failed to generate session: {e}")
         st.stop()
 
+# ---------------------------
+# Cached read-only Kite endpoints
+# ---------------------------
+# Memoize read-only endpoints for a short window. The client is passed as an
+# underscore arg (not hashed); the cache key is a short digest of the access
+# token so raw tokens never become cache keys.
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_holdings(_kite: KiteConnect, token_key: str):
+    return _kite.holdings()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_positions(_kite: KiteConnect, token_key: str):
+    return _kite.positions()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_margins(_kite: KiteConnect, token_key: str):
+    return _kite.margins()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_orders(_kite: KiteConnect, token_key: str):
+    return _kite.orders()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_trades(_kite: KiteConnect, token_key: str):
+    return _kite.trades()
+
+def clear_kite_caches():
+    """Drop memoized account data (after placing/modifying orders or on Refresh)."""
+    for fn in (fetch_holdings, fetch_positions, fetch_margins, fetch_orders, fetch_trades):
+        fn.clear()
+
 # Create authenticated kite client if we have access token
-k = None
-if "kite_access_token" in st.session_state:
-    access_token = st.session_state["kite_access_token"]
-    k = KiteConnect(api_key=API_KEY)
-    k.set_access_token(access_token)
+# Kite access tokens lapse at 06:00 IST the morning after login: warn shortly
+# before and log out once past it, instead of failing on the next API click
+IST = timezone(timedelta(hours=5, minutes=30))
+TOKEN_WARN_SECONDS = 300
+
+def token_expiry(login_time) -> Optional[datetime]:
+    # generate_session() returns login_time as a datetime
+    if not isinstance(login_time, datetime):
+        return None
+    if login_time.tzinfo is None:
+        login_time = login_time.replace(tzinfo=IST)  # Kite reports IST wall time
+    expiry = login_time.astimezone(IST).replace(hour=6, minute=0, second=0, microsecond=0)
+    if expiry <= login_time:
+        expiry += timedelta(days=1)
+    return expiry
+
+if st.session_state.get("kite_access_token"):
+    expiry = token_expiry((st.session_state.get("kite_login_response") or {}).get("login_time"))
+    seconds_left = (expiry - datetime.now(IST)).total_seconds() if expiry else None
+    if seconds_left is not None and seconds_left <= 0:
+        clear_kite_caches()
+        st.session_state.pop("kite_access_token", None)
+        st.session_state.pop("kite_login_response", None)
+        st.warning("Kite session expired (tokens lapse at 06:00 IST). Please login again.")
+    elif seconds_left is not None and seconds_left < TOKEN_WARN_SECONDS:
+        st.warning(f"Kite session expires in {int(seconds_left // 60) + 1} min — login again to keep working.")
+
+access_token = st.session_state.get("kite_access_token")
+k = get_kite(API_KEY, access_token) if access_token else None
+kite_token_key = hashlib.blake2b(access_token.encode(), digest_size=8).hexdigest() if access_token else None
 
 # ---------------------------
 # Utilities: Instruments / Market helpers (kept from your original)
 # ---------------------------
-@st.cache_data(show_spinner=False)
-def load_instruments(kite_instance, exchange=None):
-    try:
-        if exchange:
-            inst = kite_instance.instruments(exchange)
-        else:
-            inst = kite_instance.instruments()
-        df = pd.DataFrame(inst)
-        if "instrument_token" in df.columns:
-            df["instrument_token"] = df["instrument_token"].astype("int64")
-        return df
-    except Exception as e:
-        st.warning(f"Could not fetch instruments: {e}")
-        return pd.DataFrame()
-
-def find_instrument_token(df, tradingsymbol, exchange="NSE"):
-    if df.empty:
-        return None
-    mask = (df.get("exchange", "").str.upper() == exchange.upper()) & \
-           (df.get("tradingsymbol", "").str.upper() == tradingsymbol.upper())
-    hits = df[mask]
-    if not hits.empty:
-        return int(hits.iloc[0]["instrument_token"])
-    return None
-
-def get_ltp_price(kite_instance, symbol, exchange="NSE"):
+# cache_resource: every session shares the one frame instead of unpickling a
+# copy per call; callers treat it as read-only
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_instruments(_kite_instance, exchange=None):
+    # instrument dumps change once a day: keep one Parquet copy per (exchange, date)
+    today = date.today().isoformat()
+    path = CACHE_DIR / f"instruments_{exchange or 'ALL'}_{today}.parquet"
+    if path.exists():
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            path.unlink(missing_ok=True)  # corrupt copy: drop it and refetch
+    if exchange:
+        inst = _kite_instance.instruments(exchange)
+    else:
+        inst = _kite_instance.instruments()
+    df = pd.DataFrame(inst)
+    if "instrument_token" in df.columns:
+        df["instrument_token"] = df["instrument_token"].astype("int64")
+    if "expiry" in df.columns:
+        # dates mixed with "" for non-derivatives; one dtype so Arrow can store it
+        df["expiry"] = pd.to_datetime(df["expiry"], errors="coerce")
+    # low-cardinality labels as category; prices (tick_size, strike) stay float64
+    for c in ("exchange", "segment", "instrument_type", "name"):
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    if "lot_size" in df.columns:
+        df["lot_size"] = pd.to_numeric(df["lot_size"], downcast="integer")
+    if not df.empty:
+        try:
+            CACHE_DIR.mkdir(exist_ok=True)
+            # earlier days' dumps are never read again
+            for old in CACHE_DIR.glob("instruments_*.parquet"):
+                if not old.name.endswith(f"_{today}.parquet"):
+                    old.unlink(missing_ok=True)
+            # write to a temp file and rename, so concurrent sessions never read a partial file
+            fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+            os.close(fd)
+            try:
+                df.to_parquet(tmp, compression="zstd")
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+        except Exception:
+            pass  # disk copy is best-effort; the in-memory cache still applies
+    return df
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def get_symbol_index(_kite_instance, exchange, day) -> Dict[str, int]:
+    """TRADINGSYMBOL -> instrument_token for one exchange, built once per (exchange, day)."""
+    df = load_instruments(_kite_instance, exchange)
+    if df.empty or not {"tradingsymbol", "instrument_token"} <= set(df.columns):
+        return {}
+    symbols = df["tradingsymbol"].astype(str).str.upper()
+    first = ~symbols.duplicated()  # first row wins, as the old mask lookup did
+    return dict(zip(symbols[first], df["instrument_token"][first].astype("int64").tolist()))
+
+def find_instrument_token(kite_instance, tradingsymbol, exchange="NSE"):
+    index = get_symbol_index(kite_instance, exchange.upper(), date.today().isoformat())
+    return index.get(tradingsymbol.strip().upper())
+
+def instrument_keys(symbols, exchange="NSE") -> List[str]:
+    """'INFY, TCS' (or a list) -> ['NSE:INFY', 'NSE:TCS'], so one call covers every symbol."""
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    return [f"{exchange.upper()}:{s.strip().upper()}" for s in symbols if s.strip()]
+
+def get_ltp_price(kite_instance, symbols, exchange="NSE"):
     try:
-        exchange_symbol = f"{exchange.upper()}:{symbol.upper()}"
-        ltp_data = kite_instance.ltp([exchange_symbol])
+        keys = instrument_keys(symbols, exchange)
+        ltp_data = kite_instance.ltp(keys)
         return ltp_data
     except Exception as e:
         return {"error": str(e)}
 
-def get_ohlc_quote(kite_instance, symbol, exchange="NSE"):
+def get_ohlc_quote(kite_instance, symbols, exchange="NSE"):
     try:
-        exchange_symbol = f"{exchange.upper()}:{symbol.upper()}"
-        ohlc_data = kite_instance.ohlc([exchange_symbol])
+        keys = instrument_keys(symbols, exchange)
+        ohlc_data = kite_instance.ohlc(keys)
         return ohlc_data
     except Exception as e:
         return {"error": str(e)}
 
-def get_full_market_quote(kite_instance, symbol, exchange="NSE"):
+def get_full_market_quote(kite_instance, symbols, exchange="NSE"):
     try:
-        exchange_symbol = f"{exchange.upper()}:{symbol.upper()}"
-        quote = kite_instance.quote(exchange_symbol)
+        keys = instrument_keys(symbols, exchange)
+        quote = kite_instance.quote(keys)
         return quote
     except Exception as e:
         return {"error": str(e)}
 
+# Kite allows 3 historical_data requests per second
+HIST_RATE_PER_SEC = 3
+
+# Kite caps how many days one historical_data call may span, per interval
+HIST_MAX_DAYS = {
+    "minute": 60, "3minute": 100, "5minute": 100, "10minute": 100,
+    "15minute": 200, "30minute": 200, "60minute": 400, "day": 2000,
+}
+
+def hist_windows(start: datetime, end: datetime, interval: str) -> List[tuple]:
+    """Split [start, end] into back-to-back windows that fit the interval's cap."""
+    span = HIST_MAX_DAYS.get(interval)
+    if not span:
+        return [(start, end)]
+    windows = []
+    s = start
+    while s <= end:
+        e = min(datetime.combine(s.date() + timedelta(days=span - 1), datetime.max.time()), end)
+        windows.append((s, e))
+        s = datetime.combine(e.date() + timedelta(days=1), datetime.min.time())
+    return windows
+
 def get_historical(kite_instance, symbol, from_date, to_date, interval="day", exchange="NSE"):
     try:
-        inst_df = st.session_state.get("instruments_df", pd.DataFrame())
-        token = None
-        if not inst_df.empty:
-            token = find_instrument_token(inst_df, symbol, exchange)
-        if token is None:
-            st.info(f"Loading instruments for {exchange} to find token for {symbol}...")
-            all_instruments = load_instruments(kite_instance, exchange)
-            if not all_instruments.empty:
-                st.session_state["instruments_df"] = all_instruments
-                token = find_instrument_token(all_instruments, symbol, exchange)
+        token = find_instrument_token(kite_instance, symbol, exchange)
         if not token:
-            return {"error": f"Instrument token not found for {symbol} on {exchange}. Please ensure instruments are loaded or symbol/exchange is correct."}
+            return {"error": f"{symbol} is not in the {exchange} instrument index. Check the tradingsymbol and exchange."}
         from_datetime = datetime.combine(from_date, datetime.min.time())
         to_datetime = datetime.combine(to_date, datetime.max.time())
-        data = kite_instance.historical_data(token, from_date=from_datetime, to_date=to_datetime, interval=interval)
-        return data
+        # long ranges go out as concurrent per-window calls, stitched back in order
+        windows = hist_windows(from_datetime, to_datetime, interval)
+        if len(windows) == 1:
+            return kite_instance.historical_data(token, from_date=from_datetime, to_date=to_datetime, interval=interval)
+        # stagger the window starts so the burst stays under Kite's rate limit
+        start = time.monotonic()
+
+        def fetch_window(i, w):
+            time.sleep(max(0.0, start + i / HIST_RATE_PER_SEC - time.monotonic()))
+            return kite_instance.historical_data(token, from_date=w[0], to_date=w[1], interval=interval)
+
+        chunks = get_io_pool().map(fetch_window, range(len(windows)), windows)
+        return [candle for chunk in chunks for candle in chunk]
     except Exception as e:
         return {"error": str(e)}
 
+# ---------------------------
+# Shared I/O pool (overlap independent HTTP round trips)
+# ---------------------------
+def get_io_pool() -> ThreadPoolExecutor:
+    """One executor per session so button clicks don't spin up new threads."""
+    if "io_pool" not in st.session_state:
+        st.session_state["io_pool"] = ThreadPoolExecutor(max_workers=4)
+    return st.session_state["io_pool"]
+
 # ---------------------------
 # Supabase query helpers for rst_name table
 # ---------------------------
-@st.cache_data(show_spinner=False)
-def query_by_isin(isin: str) -> List[Dict]:
+# Restricted periods can change during the day: cache lookups briefly rather
+# than for the life of the process. Errors raise postgrest.APIError.
+RST_CACHE_TTL = 60
+# Only the columns the restricted check renders/evaluates
+RST_COLUMNS = "isin,ticker,name,restricted_period"
+# Upper bound on rows per lookup so a broad query can't pull the whole table
+RST_QUERY_LIMIT = 20
+
+@st.cache_data(ttl=RST_CACHE_TTL, show_spinner=False)
+def query_by_isin(isin: str, limit: int = RST_QUERY_LIMIT) -> List[Dict]:
     """Query rst_name table by exact ISIN."""
-    res = supabase.table("rst_name").select("*").eq("isin", isin).execute()
-    if res.status_code != 200:
-        raise RuntimeError(f"Supabase error: {res.data}")
+    res = get_supabase(SUPABASE_URL, SUPABASE_KEY).table("rst_name").select(RST_COLUMNS).eq("isin", isin).limit(limit).execute()
     return res.data or []
 
-@st.cache_data(show_spinner=False)
-def query_by_ticker(ticker: str) -> List[Dict]:
+@st.cache_data(ttl=RST_CACHE_TTL, show_spinner=False)
+def query_by_ticker(ticker: str, limit: int = RST_QUERY_LIMIT) -> List[Dict]:
     """Case-insensitive exact ticker match."""
     # Use ilike for case-insensitive exact by wrapping
-    res = supabase.table("rst_name").select("*").ilike("ticker", ticker).execute()
-    if res.status_code != 200:
-        raise RuntimeError(f"Supabase error: {res.data}")
+    res = get_supabase(SUPABASE_URL, SUPABASE_KEY).table("rst_name").select(RST_COLUMNS).ilike("ticker", ticker).limit(limit).execute()
     return res.data or []
 
-@st.cache_data(show_spinner=False)
-def query_by_name_fragment(fragment: str, limit: int = 20) -> List[Dict]:
+@st.cache_data(ttl=RST_CACHE_TTL, show_spinner=False)
+def query_by_name_fragment(fragment: str, limit: int = RST_QUERY_LIMIT) -> List[Dict]:
     """Search name with ilike %fragment%."""
     pattern = f"%{fragment}%"
-    res = supabase.table("rst_name").select("*").ilike("name", pattern).limit(limit).execute()
-    if res.status_code != 200:
-        raise RuntimeError(f"Supabase error: {res.data}")
+    res = get_supabase(SUPABASE_URL, SUPABASE_KEY).table("rst_name").select(RST_COLUMNS).ilike("name", pattern).limit(limit).execute()
     return res.data or []
 
-def parse_daterange(range_str: str):
+# Patterns compiled once at import instead of per call / per rerun
+# PostgreSQL daterange text form, e.g. [2025-10-01,2025-12-31)
+DATERANGE_RE = re.compile(r'^([\[\(])\s*([^,]*?)\s*,\s*([^,\]]*?)\s*([\]\)])$')
+# ISIN: 12 alphanumeric characters (e.g. INE009A01021)
+ISIN_RE = re.compile(r'^[A-Za-z0-9]{12}$')
+# ticker: up to 10 characters, letters/digits plus '.' and '-'
+TICKER_RE = re.compile(r'^[A-Za-z0-9\.\-]{1,10}$')
+
+def parse_daterange_series(ranges: pd.Series) -> pd.DataFrame:
     """
-    Very small parser for PostgreSQL daterange text form:
-    Examples: '[2025-10-01,2025-12-31)' or '(,2026-01-01]' etc.
-    Returns (lower_date_or_none, upper_date_or_none, lower_inclusive, upper_inclusive)
+    Parse a column of PostgreSQL daterange text, e.g. '[2025-10-01,2025-12-31)' or
+    '(,2026-01-01]': one regex extract + two to_datetime calls instead of a Python
+    call per row. Non-string / malformed values yield NaT bounds and non-inclusive flags.
     """
-    if range_str is None:
-        return (None, None, False, False)
-    # Pattern to capture e.g. [2025-10-01,2025-12-31)
-    m = re.match(r'^([\[\(])\s*([^,]*?)\s*,\s*([^,\]]*?)\s*([\]\)])$', range_str.strip())
-    if not m:
-        # not in expected format, return None
-        return (None, None, False, False)
-    lower_sym, lower_val, upper_val, upper_sym = m.groups()
-    lower_inc = lower_sym == "["
-    upper_inc = upper_sym == "]"
-    lower_date = None
-    upper_date = None
-    if lower_val:
-        try:
-            lower_date = datetime.fromisoformat(lower_val).date()
-        except Exception:
-            lower_date = None
-    if upper_val:
-        try:
-            upper_date = datetime.fromisoformat(upper_val).date()
-        except Exception:
-            upper_date = None
-    return (lower_date, upper_date, lower_inc, upper_inc)
-
-def is_date_in_daterange(range_str: str, check_date: date) -> bool:
-    lower, upper, lower_inc, upper_inc = parse_daterange(range_str)
-    if lower is None and upper is None:
-        return False
-    # lower bound
-    if lower:
-        if lower_inc:
-            if check_date < lower:
-                return False
-        else:
-            if check_date <= lower:
-                return False
-    if upper:
-        if upper_inc:
-            if check_date > upper:
-                return False
-        else:
-            if check_date >= upper:
-                return False
-    return True
+    parts = ranges.astype(object).str.strip().str.extract(DATERANGE_RE)
+    return pd.DataFrame({
+        "lower_date": pd.to_datetime(parts[1], errors="coerce", format="ISO8601"),
+        "upper_date": pd.to_datetime(parts[2], errors="coerce", format="ISO8601"),
+        "lower_inclusive": parts[0] == "[",
+        "upper_inclusive": parts[3] == "]",
+    }, index=ranges.index)
+
+def restricted_mask(ranges: pd.Series, check_date: date) -> pd.Series:
+    """True where check_date falls inside the row's daterange (unbounded ends are open)."""
+    if not ranges.astype(object).str.len().notna().any():
+        # nothing can be restricted: skip the extract/to_datetime passes entirely
+        return pd.Series(False, index=ranges.index)
+    parsed = parse_daterange_series(ranges)
+    lower, upper = parsed["lower_date"], parsed["upper_date"]
+    day = pd.Timestamp(check_date)
+    lower_ok = lower.isna() | (day > lower) | (parsed["lower_inclusive"] & (day == lower))
+    upper_ok = upper.isna() | (day < upper) | (parsed["upper_inclusive"] & (day == upper))
+    return (lower.notna() | upper.notna()) & lower_ok & upper_ok
+
+# ---------------------------
+# UI helper: server-side pagination for large frames
+# ---------------------------
+def paginated(df: pd.DataFrame, key: str, page_size: int = 100):
+    """Render one page of df; only that slice is serialized to the browser."""
+    pages = max(1, (len(df) + page_size - 1) // page_size)
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages  # a smaller frame was loaded since the last render
+    page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, key=key)
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size])
 
 # ---------------------------
 # Tabs (removed: Websocket, Mutual Funds, Admin/Debug)
@@ -261,31 +449,54 @@ with tab_portfolio:
     if not k:
         st.info("Login first to fetch portfolio data (use Kite login link in sidebar).")
     else:
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button("Fetch holdings"):
-                try:
-                    holdings = k.holdings()
-                    st.dataframe(pd.DataFrame(holdings))
-                except Exception as e:
-                    st.error(f"Error fetching holdings: {e}")
-        with col2:
-            if st.button("Fetch positions"):
-                try:
-                    positions = k.positions()
-                    st.subheader("Net positions")
-                    st.dataframe(pd.DataFrame(positions.get("net", [])))
-                    st.subheader("Day positions")
-                    st.dataframe(pd.DataFrame(positions.get("day", [])))
-                except Exception as e:
-                    st.error(f"Error fetching positions: {e}")
-        with col3:
-            if st.button("Fetch margins"):
-                try:
-                    margins = k.margins()
-                    st.json(margins)
-                except Exception as e:
-                    st.error(f"Error fetching margins: {e}")
+        # buttons in here rerun just this panel, not the whole script
+        @st.fragment
+        def portfolio_panel():
+            if st.button("🔄 Refresh", help="Discard cached account data and fetch fresh values"):
+                clear_kite_caches()
+            fetch_all = st.button("⚡ Fetch all", help="Fetch holdings, positions and margins in parallel")
+            # fan the three independent calls out together: wall time ~ slowest call, not the sum
+            futures = {}
+            if fetch_all:
+                pool = get_io_pool()
+                futures = {
+                    "holdings": pool.submit(fetch_holdings, k, kite_token_key),
+                    "positions": pool.submit(fetch_positions, k, kite_token_key),
+                    "margins": pool.submit(fetch_margins, k, kite_token_key),
+                }
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if st.button("Fetch holdings") or fetch_all:
+                    try:
+                        holdings = futures["holdings"].result() if futures else fetch_holdings(k, kite_token_key)
+                        st.dataframe(pd.DataFrame(holdings))
+                    except Exception as e:
+                        st.error(f"Error fetching holdings: {e}")
+            with col2:
+                if st.button("Fetch positions") or fetch_all:
+                    try:
+                        positions = futures["positions"].result() if futures else fetch_positions(k, kite_token_key)
+                        net_positions = positions.get("net", [])
+                        day_positions = positions.get("day", [])
+                        if not net_positions and not day_positions:
+                            # flat book: skip building/rendering two empty frames
+                            st.info("No open positions.")
+                        else:
+                            st.subheader("Net positions")
+                            st.dataframe(pd.DataFrame(net_positions))
+                            st.subheader("Day positions")
+                            st.dataframe(pd.DataFrame(day_positions))
+                    except Exception as e:
+                        st.error(f"Error fetching positions: {e}")
+            with col3:
+                if st.button("Fetch margins") or fetch_all:
+                    try:
+                        margins = futures["margins"].result() if futures else fetch_margins(k, kite_token_key)
+                        st.json(margins)
+                    except Exception as e:
+                        st.error(f"Error fetching margins: {e}")
+
+        portfolio_panel()
 
 # ---------------------------
 # TAB: ORDERS
@@ -295,105 +506,123 @@ with tab_orders:
     if not k:
         st.info("Login first to use orders API.")
     else:
-        st.subheader("Place order")
-        with st.form("place_order_form", clear_on_submit=False):
-            variety = st.selectbox("Variety", ["regular", "amo", "co", "iceberg"], index=0)
-            exchange = st.selectbox("Exchange", ["NSE", "BSE", "NFO", "CDS", "MCX"], index=0)
-            tradingsymbol = st.text_input("Tradingsymbol (e.g. INFY / NIFTY21...)", value="INFY")
-            transaction_type = st.selectbox("Transaction", ["BUY", "SELL"], index=0)
-            order_type = st.selectbox("Order Type", ["MARKET", "LIMIT", "SL", "SL-M"], index=0)
-            quantity = st.number_input("Quantity", min_value=1, value=1)
-            product = st.selectbox("Product", ["CNC", "MIS", "NRML", "CO", "MTF"], index=0)
-            price = st.text_input("Price (for LIMIT/SL)", value="")
-            trigger_price = st.text_input("Trigger Price (for SL/SL-M)", value="")
-            validity = st.selectbox("Validity", ["DAY", "IOC", "TTL"], index=0)
-            tag = st.text_input("Tag (optional, max 20 chars)", value="")
-            submit_place = st.form_submit_button("Place order")
-
-            if submit_place:
-                try:
-                    params = dict(
-                        variety=variety,
-                        exchange=exchange,
-                        tradingsymbol=tradingsymbol,
-                        transaction_type=transaction_type,
-                        order_type=order_type,
-                        quantity=int(quantity),
-                        product=product,
-                        validity=validity,
-                    )
-                    if price:
-                        params["price"] = float(price)
-                    if trigger_price:
-                        params["trigger_price"] = float(trigger_price)
-                    if tag:
-                        params["tag"] = tag[:20]
-                    resp = k.place_order(**params)
-                    st.success(f"Order placed: {resp}")
-                    st.json(resp)
-                except Exception as e:
-                    st.error(f"Place order failed: {e}")
-
-        st.markdown("---")
-        st.subheader("Modify / Cancel / Fetch orders")
-        col_a, col_b, col_c = st.columns(3)
-
-        with col_a:
-            if st.button("Fetch all orders (today)"):
-                try:
-                    orders = k.orders()
-                    st.dataframe(pd.DataFrame(orders))
-                except Exception as e:
-                    st.error(f"Error fetching orders: {e}")
-
-            if st.button("Fetch all trades (today)"):
-                try:
-                    trades = k.trades()
-                    st.dataframe(pd.DataFrame(trades))
-                except Exception as e:
-                    st.error(f"Error fetching trades: {e}")
-
-        with col_b:
-            order_id_for_history = st.text_input("Order ID (history / modify / cancel)", value="")
-            if st.button("Get order history"):
-                if not order_id_for_history:
-                    st.warning("Provide order_id")
-                else:
+        # order forms/buttons rerun just this panel
+        @st.fragment
+        def orders_panel():
+            st.subheader("Place order")
+            with st.form("place_order_form", clear_on_submit=False):
+                variety = st.selectbox("Variety", ["regular", "amo", "co", "iceberg"], index=0)
+                exchange = st.selectbox("Exchange", ["NSE", "BSE", "NFO", "CDS", "MCX"], index=0)
+                tradingsymbol = st.text_input("Tradingsymbol (e.g. INFY / NIFTY21...)", value="INFY")
+                transaction_type = st.selectbox("Transaction", ["BUY", "SELL"], index=0)
+                order_type = st.selectbox("Order Type", ["MARKET", "LIMIT", "SL", "SL-M"], index=0)
+                quantity = st.number_input("Quantity", min_value=1, value=1)
+                product = st.selectbox("Product", ["CNC", "MIS", "NRML", "CO", "MTF"], index=0)
+                # numeric widgets: values arrive parsed, 0 means "not set"
+                price = st.number_input("Price (for LIMIT/SL)", min_value=0.0, value=0.0, step=0.05, format="%.2f")
+                trigger_price = st.number_input("Trigger Price (for SL/SL-M)", min_value=0.0, value=0.0, step=0.05, format="%.2f")
+                validity = st.selectbox("Validity", ["DAY", "IOC", "TTL"], index=0)
+                tag = st.text_input("Tag (optional, max 20 chars)", value="")
+                submit_place = st.form_submit_button("Place order")
+
+                if submit_place:
                     try:
-                        history = k.order_history(order_id_for_history)
-                        st.json(history)
+                        params = dict(
+                            variety=variety,
+                            exchange=exchange,
+                            tradingsymbol=tradingsymbol,
+                            transaction_type=transaction_type,
+                            order_type=order_type,
+                            quantity=int(quantity),
+                            product=product,
+                            validity=validity,
+                        )
+                        if price > 0:
+                            params["price"] = price
+                        if trigger_price > 0:
+                            params["trigger_price"] = trigger_price
+                        if tag:
+                            params["tag"] = tag[:20]
+                        resp = k.place_order(**params)
+                        clear_kite_caches()
+                        st.success(f"Order placed: {resp}")
+                        st.json(resp)
                     except Exception as e:
-                        st.error(f"Get order history failed: {e}")
-
-        with col_c:
-            mod_order_id = st.text_input("Modify order id", value="")
-            new_price = st.text_input("New price", value="")
-            new_qty = st.text_input("New qty", value="")
-            if st.button("Modify order"):
-                if not mod_order_id:
-                    st.warning("Provide order id")
-                else:
+                        st.error(f"Place order failed: {e}")
+
+            st.markdown("---")
+            st.subheader("Modify / Cancel / Fetch orders")
+            col_a, col_b, col_c = st.columns(3)
+
+            with col_a:
+                fetch_both = st.button("⚡ Orders + trades", help="Fetch today's orders and trades in parallel")
+                order_futures = {}
+                if fetch_both:
+                    pool = get_io_pool()
+                    order_futures = {
+                        "orders": pool.submit(fetch_orders, k, kite_token_key),
+                        "trades": pool.submit(fetch_trades, k, kite_token_key),
+                    }
+
+                if st.button("Fetch all orders (today)") or fetch_both:
                     try:
-                        modify_args = {}
-                        if new_price:
-                            modify_args["price"] = float(new_price)
-                        if new_qty:
-                            modify_args["quantity"] = int(new_qty)
-                        res = k.modify_order(variety="regular", order_id=mod_order_id, **modify_args)
-                        st.success("Modify response")
-                        st.json(res)
+                        orders = order_futures["orders"].result() if order_futures else fetch_orders(k, kite_token_key)
+                        st.dataframe(pd.DataFrame(orders))
                     except Exception as e:
-                        st.error(f"Modify failed: {e}")
+                        st.error(f"Error fetching orders: {e}")
 
-            if st.button("Cancel order"):
-                cid = st.text_input("Cancel order id (re-enter)", value="")
-                if cid:
+                if st.button("Fetch all trades (today)") or fetch_both:
                     try:
-                        res = k.cancel_order(variety="regular", order_id=cid)
-                        st.success("Cancel response")
-                        st.json(res)
+                        trades = order_futures["trades"].result() if order_futures else fetch_trades(k, kite_token_key)
+                        st.dataframe(pd.DataFrame(trades))
                     except Exception as e:
-                        st.error(f"Cancel failed: {e}")
+                        st.error(f"Error fetching trades: {e}")
+
+            with col_b:
+                order_id_for_history = st.text_input("Order ID (history / modify / cancel)", value="")
+                if st.button("Get order history"):
+                    if not order_id_for_history:
+                        st.warning("Provide order_id")
+                    else:
+                        try:
+                            history = k.order_history(order_id_for_history)
+                            st.json(history)
+                        except Exception as e:
+                            st.error(f"Get order history failed: {e}")
+
+            with col_c:
+                mod_order_id = st.text_input("Modify order id", value="")
+                new_price = st.number_input("New price (0 = unchanged)", min_value=0.0, value=0.0, step=0.05, format="%.2f")
+                new_qty = st.number_input("New qty (0 = unchanged)", min_value=0, value=0, step=1)
+                if st.button("Modify order"):
+                    if not mod_order_id:
+                        st.warning("Provide order id")
+                    else:
+                        try:
+                            modify_args = {}
+                            if new_price > 0:
+                                modify_args["price"] = new_price
+                            if new_qty > 0:
+                                modify_args["quantity"] = int(new_qty)
+                            res = k.modify_order(variety="regular", order_id=mod_order_id, **modify_args)
+                            clear_kite_caches()
+                            st.success("Modify response")
+                            st.json(res)
+                        except Exception as e:
+                            st.error(f"Modify failed: {e}")
+
+                if st.button("Cancel order"):
+                    cid = st.text_input("Cancel order id (re-enter)", value="")
+                    if cid:
+                        try:
+                            res = k.cancel_order(variety="regular", order_id=cid)
+                            clear_kite_caches()
+                            st.success("Cancel response")
+                            st.json(res)
+                        except Exception as e:
+                            st.error(f"Cancel failed: {e}")
+
+        orders_panel()
 
 # ---------------------------
 # TAB: MARKET & HISTORICAL
@@ -403,86 +632,103 @@ with tab_market:
     if not k:
         st.info("Login first to fetch market data (quotes/historical).")
     else:
-        st.subheader("Market Data Snapshot")
-        q_exchange = st.selectbox("Exchange for market data", ["NSE", "BSE", "NFO"], index=0, key="market_exchange")
-        q_symbol = st.text_input("Tradingsymbol (e.g., INFY)", value="INFY", key="market_symbol")
-        market_data_type = st.radio("Choose data type:", 
-                                     ("LTP (Last Traded Price)", "OHLC + LTP", "Full Market Quote (OHLC, Depth, OI)"), 
-                                     index=0, key="market_data_type_radio")
-
-        if st.button("Get market data"):
-            market_data_response = {}
-            if market_data_type == "LTP (Last Traded Price)":
-                market_data_response = get_ltp_price(k, q_symbol, q_exchange)
-            elif market_data_type == "OHLC + LTP":
-                market_data_response = get_ohlc_quote(k, q_symbol, q_exchange)
-            else:
-                market_data_response = get_full_market_quote(k, q_symbol, q_exchange)
-            if "error" in market_data_response:
-                st.error(f"Market data fetch failed: {market_data_response['error']}")
-            else:
-                st.json(market_data_response)
-
-        st.markdown("---")
-        st.subheader("Historical candles")
-        with st.expander("Instrument dump (load)"):
-            exchange_for_dump = st.selectbox("Instrument dump exchange (for lookup)", ["NSE", "BSE", "NFO", "BCD", "MCX"], index=0, key="inst_exchange")
-            if st.button("Load instrument dump"):
-                inst_df = load_instruments(k, exchange_for_dump)
-                st.session_state["instruments_df"] = inst_df
-                if not inst_df.empty:
-                    st.success(f"Loaded {len(inst_df)} instruments for {exchange_for_dump}")
+        # quote/historical submits rerun just this panel
+        @st.fragment
+        def market_panel():
+            st.subheader("Market Data Snapshot")
+            with st.form("market_data_form"):
+                q_exchange = st.selectbox("Exchange for market data", ["NSE", "BSE", "NFO"], index=0, key="market_exchange")
+                q_symbol = st.text_input("Tradingsymbol(s), comma separated (e.g., INFY, TCS)", value="INFY", key="market_symbol")
+                market_data_type = st.radio("Choose data type:", 
+                                             ("LTP (Last Traded Price)", "OHLC + LTP", "Full Market Quote (OHLC, Depth, OI)"), 
+                                             index=0, key="market_data_type_radio")
+                get_market_data = st.form_submit_button("Get market data")
+
+            if get_market_data:
+                market_data_response = {}
+                if market_data_type == "LTP (Last Traded Price)":
+                    market_data_response = get_ltp_price(k, q_symbol, q_exchange)
+                elif market_data_type == "OHLC + LTP":
+                    market_data_response = get_ohlc_quote(k, q_symbol, q_exchange)
                 else:
-                    st.warning(f"Could not load instruments for {exchange_for_dump}.")
-
-        inst_df = st.session_state.get("instruments_df", pd.DataFrame())
-        hist_exchange = st.selectbox("Exchange (for historical)", ["NSE", "BSE", "NFO"], index=0, key="hist_ex")
-        hist_symbol = st.text_input("Historical tradingsymbol (eg INFY)", value="INFY", key="hist_sym")
-        from_date = st.date_input("From date", key="from_dt")
-        to_date = st.date_input("To date", key="to_dt")
-        interval = st.selectbox("Interval", ["minute", "5minute", "15minute", "30minute", "day", "week", "month"], index=4)
-
-        if st.button("Fetch historical data"):
-            hist_data = get_historical(k, hist_symbol, from_date, to_date, interval, hist_exchange)
-            if "error" in hist_data:
-                st.error(f"Historical fetch failed: {hist_data['error']}")
-            else:
-                df = pd.DataFrame(hist_data)
-                if not df.empty:
-                    if "date" in df.columns:
-                        df["date"] = pd.to_datetime(df["date"])
-                    st.dataframe(df)
+                    market_data_response = get_full_market_quote(k, q_symbol, q_exchange)
+                if "error" in market_data_response:
+                    st.error(f"Market data fetch failed: {market_data_response['error']}")
                 else:
-                    st.write("No historical data returned.")
+                    st.json(market_data_response)
+
+            st.markdown("---")
+            st.subheader("Historical candles")
+            with st.expander("Instrument dump (load)"):
+                exchange_for_dump = st.selectbox("Instrument dump exchange (for lookup)", ["NSE", "BSE", "NFO", "BCD", "MCX"], index=0, key="inst_exchange")
+                if st.button("Load instrument dump"):
+                    try:
+                        inst_df = load_instruments(k, exchange_for_dump)
+                        st.session_state["instruments_df"] = inst_df
+                        st.success(f"Loaded {len(inst_df)} instruments for {exchange_for_dump}")
+                    except Exception as e:
+                        st.warning(f"Could not load instruments for {exchange_for_dump}: {e}")
+
+            # one rerun on submit instead of one per widget change
+            with st.form("hist_form"):
+                hist_exchange = st.selectbox("Exchange (for historical)", ["NSE", "BSE", "NFO"], index=0, key="hist_ex")
+                hist_symbol = st.text_input("Historical tradingsymbol (eg INFY)", value="INFY", key="hist_sym")
+                from_date = st.date_input("From date", key="from_dt")
+                to_date = st.date_input("To date", key="to_dt")
+                interval = st.selectbox("Interval", ["minute", "5minute", "15minute", "30minute", "day", "week", "month"], index=4)
+                fetch_hist = st.form_submit_button("Fetch historical data")
+
+            if fetch_hist:
+                hist_data = get_historical(k, hist_symbol, from_date, to_date, interval, hist_exchange)
+                if "error" in hist_data:
+                    st.error(f"Historical fetch failed: {hist_data['error']}")
+                else:
+                    df = pd.DataFrame(hist_data)
+                    if not df.empty:
+                        # pykiteconnect usually hands back datetimes already; only parse strings,
+                        # with an ISO format hint so pandas skips per-element inference
+                        if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+                            df["date"] = pd.to_datetime(df["date"], format="ISO8601", cache=True)
+                        st.dataframe(df)
+                    else:
+                        st.write("No historical data returned.")
+
+        market_panel()
 
 # ---------------------------
 # TAB: INSTRUMENTS DUMP & UTILS
 # ---------------------------
 with tab_inst:
     st.header("Instruments dump & helper utilities")
-    inst_exchange = st.selectbox("Load instruments for exchange", ["NSE", "BSE", "NFO", "BCD", "MCX"], index=0)
-    if st.button("Load instruments for exchange (cached)"):
-        try:
-            df = load_instruments(k, inst_exchange)
-            st.session_state["instruments_df"] = df
-            st.success(f"Loaded {len(df)} instruments for {inst_exchange}")
-        except Exception as e:
-            st.error(f"Load instruments failed: {e}")
-
-    df = st.session_state.get("instruments_df", pd.DataFrame())
-    if not df.empty:
-        st.write("Search by trading symbol & exchange")
-        sy = st.text_input("Symbol to search (tradingsymbol)", value="INFY", key="inst_search_sym")
-        if st.button("Find instrument token"):
-            token = find_instrument_token(df, sy, inst_exchange)
-            if token:
-                st.success(f"Found instrument_token: {token}")
-            else:
-                st.warning("Not found. Try loading correct exchange dump or exact tradingsymbol.")
-        st.markdown("Preview instruments (first 200 rows)")
-        st.dataframe(df.head(200))
+    if not k:
+        st.info("Login first to load instruments.")
     else:
-        st.info("No instruments loaded. Click Load instruments to fetch.")
+        inst_exchange = st.selectbox("Load instruments for exchange", ["NSE", "BSE", "NFO", "BCD", "MCX"], index=0)
+        if st.button("Load instruments for exchange (cached)"):
+            try:
+                df = load_instruments(k, inst_exchange)
+                st.session_state["instruments_df"] = df
+                st.success(f"Loaded {len(df)} instruments for {inst_exchange}")
+            except Exception as e:
+                st.error(f"Load instruments failed: {e}")
+
+        df = st.session_state.get("instruments_df", pd.DataFrame())
+        if not df.empty:
+            st.write("Search by trading symbol & exchange")
+            sy = st.text_input("Symbol to search (tradingsymbol)", value="INFY", key="inst_search_sym")
+            if st.button("Find instrument token"):
+                try:
+                    token = find_instrument_token(k, sy, inst_exchange)
+                    if token:
+                        st.success(f"Found instrument_token: {token}")
+                    else:
+                        st.warning(f"{sy} is not in the {inst_exchange} instrument index. Check the exact tradingsymbol.")
+                except Exception as e:
+                    st.error(f"Lookup failed: {e}")
+            st.markdown(f"Instruments ({len(df)} rows, 100 per page)")
+            paginated(df, key="inst_page")
+        else:
+            st.info("No instruments loaded. Click Load instruments to fetch.")
 
 # ---------------------------
 # TAB: Check Restricted or Not
@@ -491,29 +737,36 @@ with tab_restrict:
     st.header("Check restricted or not")
     st.write("Enter an ISIN, ticker or partial name — the system will search the `rst_name` table and tell you if the security is currently in a restricted period.")
 
-    col1, col2 = st.columns([3,1])
-    with col1:
-        user_input = st.text_input("ISIN / Ticker / Name", value="", placeholder="e.g. INE009A01021 or INFY or Infosys")
-    with col2:
-        search_btn = st.button("Check")
+    # form: typing doesn't rerun the script; only "Check" does
+    with st.form("restrict_form"):
+        col1, col2 = st.columns([3,1])
+        with col1:
+            user_input = st.text_input("ISIN / Ticker / Name", value="", placeholder="e.g. INE009A01021 or INFY or Infosys")
+        with col2:
+            search_btn = st.form_submit_button("Check")
+        show_parsed = st.checkbox("Show parsed restricted_period details for rows")
 
     def decide_query_and_run(term: str):
         term_clean = term.strip()
         if not term_clean:
-            return []
+            return [], None
 
         # heuristic: ISIN is commonly 12 characters and alphanumeric (e.g. INE009A01021)
-        if len(term_clean) >= 12 and len(term_clean) <= 12 and re.match(r'^[A-Za-z0-9]+$', term_clean):
+        if ISIN_RE.match(term_clean):
             # treat as ISIN
             rows = query_by_isin(term_clean)
             source = "isin"
-        elif len(term_clean) <= 10 and re.match(r'^[A-Za-z0-9\.\-]+$', term_clean):
-            # likely ticker
-            rows = query_by_ticker(term_clean)
+        elif TICKER_RE.match(term_clean):
+            # likely ticker; run the name-fragment fallback concurrently so a
+            # miss costs one round trip instead of two
+            pool = get_io_pool()
+            ticker_future = pool.submit(query_by_ticker, term_clean)
+            name_future = pool.submit(query_by_name_fragment, term_clean)
+            rows = ticker_future.result()
             source = "ticker"
             # if no rows, fallback to name fragment
             if not rows:
-                rows = query_by_name_fragment(term_clean)
+                rows = name_future.result()
                 source = "name_fragment"
         else:
             # treat as name fragment
@@ -521,7 +774,10 @@ with tab_restrict:
             source = "name_fragment"
         return rows, source
 
-    if search_btn:
+    if search_btn and not user_input.strip():
+        # short-circuit: no Supabase round trip for an empty query
+        st.warning("Enter an ISIN, ticker or name to check.")
+    elif search_btn:
         try:
             rows, source = decide_query_and_run(user_input)
             if not rows:
@@ -529,9 +785,11 @@ with tab_restrict:
             else:
                 # Transform result to DataFrame for display
                 df = pd.DataFrame(rows)
+                if len(rows) >= RST_QUERY_LIMIT:
+                    st.caption(f"Showing the first {RST_QUERY_LIMIT} matches; refine the query to narrow results.")
                 # compute 'currently_restricted' column using restricted_period
                 today = date.today()
-                df["currently_restricted"] = df["restricted_period"].apply(lambda x: is_date_in_daterange(x, today) if isinstance(x, str) else False)
+                df["currently_restricted"] = restricted_mask(df["restricted_period"], today)
                 # show top info summary
                 restricted_any = df["currently_restricted"].any()
                 if restricted_any:
@@ -545,23 +803,17 @@ with tab_restrict:
                 st.dataframe(show_df)
 
                 # If multiple rows, allow user to inspect the row and show parsed range details
-                if st.checkbox("Show parsed restricted_period details for rows"):
-                    parsed = []
-                    for idx, row in df.iterrows():
-                        r = row.get("restricted_period")
-                        lower, upper, lower_inc, upper_inc = parse_daterange(r) if isinstance(r, str) else (None, None, False, False)
-                        parsed.append({
-                            "isin": row.get("isin"),
-                            "ticker": row.get("ticker"),
-                            "name": row.get("name"),
-                            "restricted_period_raw": r,
-                            "lower_date": lower,
-                            "upper_date": upper,
-                            "lower_inclusive": lower_inc,
-                            "upper_inclusive": upper_inc,
-                            "currently_restricted": row.get("currently_restricted")
-                        })
-                    st.dataframe(pd.DataFrame(parsed))
+                if show_parsed:
+                    parsed = parse_daterange_series(df["restricted_period"])
+                    parsed["lower_date"] = parsed["lower_date"].dt.date
+                    parsed["upper_date"] = parsed["upper_date"].dt.date
+                    parsed = pd.concat([
+                        df[["isin", "ticker", "name"]],
+                        df["restricted_period"].rename("restricted_period_raw"),
+                        parsed,
+                        df["currently_restricted"],
+                    ], axis=1)
+                    st.dataframe(parsed)
         except Exception as e:
             st.error(f"Check failed: {e}")
 
@@ -574,5 +826,5 @@ st.write("""
 - Ensure your `rst_name` table exists in Supabase and has the RLS policies you posted (rows with `created_by IS NULL` are readable by anon requests because the policy allows `created_by IS NULL`).
 - If you want to enforce user-level visibility (created_by = user uuid), use Supabase client-side auth and pass JWT to Supabase so `auth.uid()` works; then replace the anon key with user-scoped requests.
 - This app uses the Supabase Python client to query the `rst_name` table and a tiny daterange parser to check if today's date falls inside `restricted_period`. The parser handles typical textual PostgreSQL daterange shapes like `[2025-10-01,2025-12-31)` and similar.
-- If you use Postgres range types in a different textual shape or JSON, adjust `parse_daterange()` accordingly.
+- If you use Postgres range types in a different textual shape or JSON, adjust `parse_daterange_series()` accordingly.
 """)